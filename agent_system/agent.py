@@ -1,10 +1,23 @@
 import os
-import json
+import asyncio
+import logging
+import json_utils
 import importlib
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from memory import Memory
-from llm_provider import get_llm_provider
+from llm_cache import LLMCache
+from plan_cache import PlanCache
+from llm_provider import get_llm_provider, ProviderError
+from tool import TOOL_INDEX_NAME, TOOL_INDEX_PATH
+
+log = logging.getLogger(__name__)
+
+# Maximum number of tool results kept per agent
+TOOL_CACHE_MAX_ITEMS = 256
 
 class Agent:
     """
@@ -19,6 +32,13 @@ class Agent:
         self.memory = Memory(max_items=10, enabled=self.config.get("config", {}).get("memory", False))
         self.llm_provider_name = llm_provider
         self.llm = get_llm_provider(llm_provider)
+        self.cache = LLMCache(enabled=self.config.get("config", {}).get("cache", False))
+        self.plan_cache = PlanCache(enabled=self.config.get("config", {}).get("plan_cache", False))
+        self._tool_cache = OrderedDict()
+        # Tools run in worker threads (speculative and async execution)
+        self._tool_cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._refresh_prompt_cache()
             
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from JSON file"""
@@ -27,46 +47,131 @@ class Agent:
             
         with open(config_path, 'r') as f:
             try:
-                return json.load(f)
-            except json.JSONDecodeError as e:
+                return json_utils.loads(f.read())
+            except json_utils.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON in config file: {e}")
     
+    def _load_tool_index(self) -> Tuple[Dict[str, Dict[str, Any]], float]:
+        """Load all tool configurations from the tool index in a single read
+        
+        Returns:
+            The tool index and its modification time
+        """
+        if not os.path.exists(TOOL_INDEX_PATH):
+            return {}, 0.0
+            
+        index_mtime = os.path.getmtime(TOOL_INDEX_PATH)
+        with open(TOOL_INDEX_PATH, 'r') as f:
+            try:
+                return json_utils.loads(f.read()), index_mtime
+            except json_utils.JSONDecodeError as e:
+                log.warning("Invalid JSON in tool index %s: %s", TOOL_INDEX_PATH, e)
+                return {}, 0.0
+    
     def _load_tools(self, tool_names: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Load tool definitions from tool configuration files"""
+        """Load tool definitions from the tool index or tool configuration files"""
         tools = {}
+        tool_index, index_mtime = self._load_tool_index()
         
         for tool_name in tool_names:
-            tool_config_path = f"tools/{tool_name}.json"
-            if not os.path.exists(tool_config_path):
-                print(f"Warning: Tool config not found: {tool_config_path}")
+            if tool_name == TOOL_INDEX_NAME:
+                log.warning("Tool name is reserved for the tool index: %s", tool_name)
                 continue
                 
-            with open(tool_config_path, 'r') as f:
-                tool_config = json.load(f)
+            tool_config = tool_index.get(tool_name)
+            tool_config_path = f"tools/{tool_name}.json"
+            
+            # The tool's own file wins if it isn't indexed or was edited after the index
+            try:
+                file_mtime = os.path.getmtime(tool_config_path)
+            except OSError:
+                file_mtime = None
+                
+            if file_mtime is not None and (tool_config is None or file_mtime > index_mtime):
+                with open(tool_config_path, 'r') as f:
+                    tool_config = json_utils.loads(f.read())
+                    
+            if tool_config is None:
+                log.warning("Tool config not found: %s", tool_config_path)
+                continue
+            
+            tool_config = self._resolve_tool(tool_name, tool_config)
+            if tool_config is not None:
                 tools[tool_name] = tool_config
                 
         return tools
     
+    def _resolve_tool(self, tool_name: str, tool_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resolve the tool function once so calls skip the import machinery
+        
+        Returns:
+            The tool config with its "_callable" set, or None if the function can't be loaded
+        """
+        if callable(tool_config.get("_callable")):
+            return tool_config
+            
+        try:
+            module_name, function_name = tool_config["function"].rsplit('.', 1)
+            module = importlib.import_module(module_name)
+            function = getattr(module, function_name)
+        except Exception as e:
+            log.warning("Could not load function for tool '%s': %s", tool_name, e)
+            return None
+            
+        return {**tool_config, "_callable": function}
+    
     def _execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
         """Execute a tool function with the given parameters"""
         if tool_name not in self.tools:
             return f"Error: Tool '{tool_name}' not found"
             
         tool_config = self.tools[tool_name]
-        function_path = tool_config.get("function")
         
-        if not function_path:
-            return f"Error: Function path not defined for tool '{tool_name}'"
-            
+        # Only tools marked cacheable are free of side effects
+        cacheable = tool_config.get("cacheable", False)
+        if cacheable:
+            cache_key = tool_name + "|" + json_utils.dumps(parameters, sort_keys=True)
+            with self._tool_cache_lock:
+                if cache_key in self._tool_cache:
+                    self._tool_cache.move_to_end(cache_key)
+                    return self._tool_cache[cache_key]
+        
         try:
-            module_name, function_name = function_path.rsplit('.', 1)
-            module = importlib.import_module(module_name)
-            function = getattr(module, function_name)
-            return function(**parameters)
-        except (ImportError, AttributeError) as e:
-            return f"Error loading tool function: {str(e)}"
+            result = tool_config["_callable"](**parameters)
         except Exception as e:
             return f"Error executing tool: {str(e)}"
+            
+        if cacheable:
+            with self._tool_cache_lock:
+                self._tool_cache[cache_key] = result
+                
+                # Evict least recently used results
+                while len(self._tool_cache) > TOOL_CACHE_MAX_ITEMS:
+                    self._tool_cache.popitem(last=False)
+        return result
+    
+    def set_tools(self, tools: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the agent's tools and rebuild the prompt derived from them
+        
+        Tools whose function can't be loaded are dropped, as in _load_tools.
+        """
+        resolved = {}
+        for tool_name, tool_config in tools.items():
+            tool_config = self._resolve_tool(tool_name, tool_config)
+            if tool_config is not None:
+                resolved[tool_name] = tool_config
+                
+        self.tools = resolved
+        with self._tool_cache_lock:
+            self._tool_cache.clear()
+        self._refresh_prompt_cache()
+    
+    def _refresh_prompt_cache(self) -> None:
+        """Precompute the system prompt and formatted tools, which don't depend on the query"""
+        self._system_prompt = self._create_system_prompt()
+        # Same message at the head of every request so the provider can reuse its prompt prefix cache
+        self._system_message = {"role": "system", "content": self._system_prompt}
+        self._formatted_tools = self._format_tools_for_llm()
     
     def _create_system_prompt(self) -> str:
         """Create system prompt from config"""
@@ -78,26 +183,26 @@ class Agent:
         
         if prompt_template:
             # Use custom template if provided
-            system_prompt = prompt_template.format(
+            parts = [prompt_template.format(
                 agent_name=self.name,
                 backstory=backstory,
                 task=task
-            )
+            )]
         else:
             # Default template
-            system_prompt = f"""You are {self.name}. {backstory}
+            parts = [f"""You are {self.name}. {backstory}
 Your task is to {task}.
 
 You have access to the following tools:
-"""
+"""]
             # Add tools information
             for tool_name, tool_config in self.tools.items():
-                system_prompt += f"- {tool_name}: {tool_config.get('description', '')}\n"
+                parts.append(f"- {tool_name}: {tool_config.get('description', '')}\n")
             
             if think:
-                system_prompt += f"\nThinking process: {think}\n"
+                parts.append(f"\nThinking process: {think}\n")
         
-        system_prompt += """
+        parts.append("""
 To use a tool, use the following format:
 ```
 {
@@ -112,57 +217,324 @@ To use a tool, use the following format:
 First think about the request, then decide if you need to use a tool.
 If you need to use a tool, output ONLY the JSON above.
 After receiving tool results, respond to the user naturally.
-"""
-        return system_prompt
+""")
+        return "".join(parts)
     
     def _format_tools_for_llm(self) -> List[Dict[str, Any]]:
         """Format tools in format appropriate for the LLM provider"""
         return self.llm.format_tools(self.tools)
     
+    def _cache_keys(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Tuple[str, Optional[str], Optional[str]]:
+        """Build the cache key, semantic scope and lookup text for an LLM request"""
+        model = getattr(self.llm, "model", self.llm_provider_name)
+        tool_names = sorted(self.tools) if tools is not None else []
+        key = LLMCache.make_key(model, messages, tool_names)
+        
+        # Semantic lookup is scoped to the context preceding the user turn
+        scope, text = None, None
+        if messages and messages[-1]["role"] == "user":
+            scope = LLMCache.make_key(model, messages[:-1], tool_names)
+            text = messages[-1]["content"]
+            
+        return key, scope, text
+    
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]]
+    ) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """Look up an LLM request in the response cache
+        
+        Returns:
+            The cached response (None on a miss) and the key, scope and text to
+            pass to _cache_store; the key is None when caching is disabled
+        """
+        if not self.cache.is_enabled():
+            return None, None, None, None
+            
+        key, scope, text = self._cache_keys(messages, tools)
+        return self.cache.get(key, scope=scope, text=text), key, scope, text
+    
+    def _cache_store(
+        self,
+        key: Optional[str],
+        scope: Optional[str],
+        text: Optional[str],
+        response: str,
+        failed: bool = False
+    ) -> None:
+        """Store an LLM response found missing by _cache_lookup
+        
+        Args:
+            failed: Whether the provider reported an error, e.g. partway through a stream
+        """
+        # Don't cache provider errors so the next call retries
+        if key is None or failed or not response or isinstance(response, ProviderError):
+            return
+        self.cache.set(key, response, scope=scope, text=text)
+    
+    def _get_llm_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
+        """Get a response from the LLM, serving repeated requests from the cache"""
+        response, key, scope, text = self._cache_lookup(messages, tools)
+        if response is not None:
+            return response
+            
+        response = self.llm.get_response(messages=messages, tools=tools)
+        self._cache_store(key, scope, text, response)
+        return response
+    
+    async def _aget_llm_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
+        """Get a response from the LLM asynchronously, serving repeated requests from the cache"""
+        response, key, scope, text = self._cache_lookup(messages, tools)
+        if response is not None:
+            return response
+            
+        response = await self.llm.aget_response(messages=messages, tools=tools)
+        self._cache_store(key, scope, text, response)
+        return response
+    
+    def _stream_llm_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Iterator[str]:
+        """Stream a response from the LLM, serving repeated requests from the cache"""
+        response, key, scope, text = self._cache_lookup(messages, tools)
+        if response is not None:
+            yield response
+            return
+            
+        chunks = []
+        failed = False
+        for chunk in self.llm.get_response_stream(messages=messages, tools=tools):
+            failed = failed or isinstance(chunk, ProviderError)
+            chunks.append(chunk)
+            yield chunk
+            
+        self._cache_store(key, scope, text, "".join(chunks), failed)
+    
+    def _build_messages(self, query: str) -> List[Dict[str, Any]]:
+        """Prepare the messages for a query and record it in memory"""
+        # Add memory if enabled
+        history = self.memory.get_messages() if self.memory.is_enabled() else []
+        
+        # Add the current query after the static system prompt and history
+        messages = [self._system_message, *history, {"role": "user", "content": query}]
+        self.memory.add("user", query)
+        
+        return messages
+    
+    def _get_tool_response(self, messages: List[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]], Optional[Future]]:
+        """Get the tool routing response, starting the tool as soon as its call is complete
+        
+        Returns:
+            The full response, the tool call found while streaming (if any) and
+            the future of its speculative execution
+        """
+        chunks = []
+        tool_call, future = None, None
+        
+        for chunk in self._stream_llm_response(messages=messages, tools=self._formatted_tools):
+            chunks.append(chunk)
+            
+            # A tool call can only become complete when a closing brace arrives
+            if future is None and "}" in chunk:
+                partial_response = "".join(chunks)
+                partial_call = self.llm.extract_tool_call(partial_response)
+                if partial_call and self._can_speculate(partial_response, partial_call):
+                    tool_call = partial_call
+                    future = self._executor.submit(
+                        self._execute_tool,
+                        tool_call.get("tool"),
+                        tool_call.get("parameters", {})
+                    )
+                    
+        return "".join(chunks), tool_call, future
+    
+    def _can_speculate(self, partial_response: str, tool_call: Dict[str, Any]) -> bool:
+        """Check if a tool call found in a partial response is safe to run early
+        
+        A call found in a partial response can still differ from the one in the
+        full response (e.g. a call nested inside one that isn't complete yet),
+        so only side-effect free tools or a call starting at the first brace,
+        which can't change as more text arrives, are run early.
+        """
+        tool_config = self.tools.get(tool_call.get("tool"))
+        if tool_config is None:
+            return False
+        if tool_config.get("cacheable", False):
+            return True
+        return self.llm.extract_tool_call(partial_response, first_only=True) == tool_call
+    
+    def _plan_context(self, messages: List[Dict[str, Any]]) -> str:
+        """Get the previous turn before the query, which plan cache lookups depend on"""
+        history = messages[1:-1]
+        return json_utils.dumps([message["content"] for message in history[-2:]])
+    
+    def _get_planned_tool_call(self, query: str, plan_context: str) -> Optional[Dict[str, Any]]:
+        """Get the tool call the plan cache knows for a query, if its tool is still loaded"""
+        tool_call = self.plan_cache.get(query, plan_context)
+        if tool_call and tool_call["tool"] in self.tools:
+            return tool_call
+        return None
+    
+    def _plan_tool_call(
+        self,
+        query: str,
+        plan_context: str,
+        messages: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Future]]:
+        """Find the tool call for a query, skipping the LLM when the plan cache knows it
+        
+        Returns:
+            The routing response (None on a plan cache hit), the tool call (if any),
+            and the speculative call and future from _get_tool_response
+        """
+        tool_call = self._get_planned_tool_call(query, plan_context)
+        if tool_call:
+            return None, tool_call, None, None
+            
+        tool_response, speculative_call, future = self._get_tool_response(messages)
+        return tool_response, self.llm.extract_tool_call(tool_response), speculative_call, future
+    
+    def _add_tool_result(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_call: Dict[str, Any],
+        speculative_call: Optional[Dict[str, Any]] = None,
+        future: Optional[Future] = None
+    ) -> Any:
+        """Execute a tool call, add it and its result to the messages and return the result"""
+        # Reuse the speculative execution if it ran the same call
+        if future is not None and speculative_call == tool_call:
+            tool_result = future.result()
+        else:
+            tool_result = self._execute_tool(tool_call.get("tool"), tool_call.get("parameters", {}))
+            
+        self._append_tool_result(messages, tool_call, tool_result)
+        return tool_result
+    
+    def _append_tool_result(self, messages: List[Dict[str, Any]], tool_call: Dict[str, Any], tool_result: Any) -> None:
+        """Add a tool call and its result to the messages"""
+        # Add tool response to context
+        messages.append({
+            "role": "assistant",
+            "content": json_utils.dumps(tool_call)
+        })
+        
+        messages.append({
+            "role": "system",
+            "content": f"Tool result: {tool_result}"
+        })
+    
+    def _run_tool_call(
+        self,
+        query: str,
+        plan_context: str,
+        messages: List[Dict[str, Any]],
+        tool_call: Dict[str, Any],
+        speculative_call: Optional[Dict[str, Any]] = None,
+        future: Optional[Future] = None
+    ) -> None:
+        """Run a tool call, add its result to the messages and record the outcome in the plan cache"""
+        tool_result = self._add_tool_result(messages, tool_call, speculative_call, future)
+        self._record_plan(query, plan_context, tool_call, tool_result)
+    
+    def _record_plan(self, query: str, plan_context: str, tool_call: Dict[str, Any], tool_result: Any) -> None:
+        """Record the outcome of a tool call in the plan cache"""
+        self.plan_cache.record(query, tool_call, not str(tool_result).startswith("Error"), plan_context)
+    
     def process_query(self, query: str) -> str:
         """Process a user query using LLM and tools"""
         try:
-            # Prepare messages for the LLM
-            messages = [{"role": "system", "content": self._create_system_prompt()}]
+            messages = self._build_messages(query)
+            plan_context = self._plan_context(messages)
             
-            # Add memory if enabled
-            if self.memory.is_enabled():
-                messages.extend(self.memory.get_messages())
+            # Get tool recommendations from the plan cache or LLM
+            tool_response, tool_call, speculative_call, future = self._plan_tool_call(query, plan_context, messages)
+            
+            # Check if LLM wants to use a tool
+            if tool_call:
+                self._run_tool_call(query, plan_context, messages, tool_call, speculative_call, future)
+                
+                # Get final response after tool execution
+                final_response = self._get_llm_response(
+                    messages=messages,
+                    tools=None  # No tools on final response
+                )
+                
+                self.memory.add("assistant", final_response)
+                return final_response
+            else:
+                # If no tool call, just return the response
+                self.memory.add("assistant", tool_response)
+                return tool_response
                 
-            # Add the current query
-            messages.append({"role": "user", "content": query})
-            self.memory.add("user", query)
+        except Exception as e:
+            return f"Error processing query: {str(e)}"
+    
+    def process_query_stream(self, query: str) -> Iterator[str]:
+        """Process a user query, yielding the final response as it is generated
+        
+        The tool routing step is not streamed since the tool call has to be
+        parsed from the complete response.
+        """
+        try:
+            messages = self._build_messages(query)
+            plan_context = self._plan_context(messages)
             
-            # Get tool recommendations from LLM
-            tool_response = self.llm.get_response(
-                messages=messages,
-                tools=self._format_tools_for_llm()
-            )
+            # Get tool recommendations from the plan cache or LLM
+            tool_response, tool_call, speculative_call, future = self._plan_tool_call(query, plan_context, messages)
             
             # Check if LLM wants to use a tool
-            tool_call = self.llm.extract_tool_call(tool_response)
-            
             if tool_call:
-                # Extract tool details
-                tool_name = tool_call.get("tool")
-                parameters = tool_call.get("parameters", {})
+                self._run_tool_call(query, plan_context, messages, tool_call, speculative_call, future)
                 
-                # Execute the tool
-                tool_result = self._execute_tool(tool_name, parameters)
-                
-                # Add tool response to context
-                messages.append({
-                    "role": "assistant",
-                    "content": json.dumps(tool_call)
-                })
+                # Stream final response after tool execution
+                chunks = []
+                for chunk in self._stream_llm_response(messages=messages, tools=None):
+                    chunks.append(chunk)
+                    yield chunk
+                    
+                self.memory.add("assistant", "".join(chunks))
+            else:
+                # If no tool call, the response is already complete
+                self.memory.add("assistant", tool_response)
+                yield tool_response
                 
-                messages.append({
-                    "role": "system",
-                    "content": f"Tool result: {tool_result}"
-                })
+        except Exception as e:
+            yield f"Error processing query: {str(e)}"
+    
+    async def aprocess_query(self, query: str) -> str:
+        """Process a user query using LLM and tools without blocking the event loop
+        
+        Memory belongs to a single conversation, so concurrent calls on one shared
+        agent require memory to be disabled; use an agent per conversation otherwise.
+        """
+        try:
+            messages = self._build_messages(query)
+            plan_context = self._plan_context(messages)
+            
+            # Get tool recommendations from the plan cache or LLM
+            tool_response = None
+            tool_call = self._get_planned_tool_call(query, plan_context)
+            if not tool_call:
+                tool_response = await self._aget_llm_response(
+                    messages=messages,
+                    tools=self._formatted_tools
+                )
+                tool_call = self.llm.extract_tool_call(tool_response)
+            
+            # Check if LLM wants to use a tool
+            if tool_call:
+                # Tools are synchronous, so run them off the event loop; the shared
+                # messages and plan cache are only updated back on the loop
+                tool_result = await asyncio.to_thread(
+                    self._execute_tool,
+                    tool_call.get("tool"),
+                    tool_call.get("parameters", {})
+                )
+                self._append_tool_result(messages, tool_call, tool_result)
+                self._record_plan(query, plan_context, tool_call, tool_result)
                 
                 # Get final response after tool execution
-                final_response = self.llm.get_response(
+                final_response = await self._aget_llm_response(
                     messages=messages,
                     tools=None  # No tools on final response
                 )
@@ -184,4 +556,12 @@ def create_agent(config_path: str, llm_provider: str = "openai"):
 
 def run_agent(agent: Agent, query: str) -> str:
     """Run the agent with a query and return the response"""
-    return agent.process_query(query)
\ No newline at end of file
+    return agent.process_query(query)
+
+def run_agent_stream(agent: Agent, query: str) -> Iterator[str]:
+    """Run the agent with a query and yield the response as it is generated"""
+    return agent.process_query_stream(query)
+
+async def arun_agent(agent: Agent, query: str) -> str:
+    """Run the agent with a query asynchronously and return the response"""
+    return await agent.aprocess_query(query)
\ No newline at end of file
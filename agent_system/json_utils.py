@@ -0,0 +1,42 @@
+import json
+from typing import Any, Union
+
+# Use orjson for faster parsing and serialization when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so callers can catch either
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document
+
+    Args:
+        data: JSON text
+
+    Returns:
+        The decoded Python object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Serialize an object to compact JSON text
+
+    Args:
+        obj: Object to serialize
+        sort_keys: Whether to sort dictionary keys, for stable cache keys
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode("utf-8")
+        except TypeError:
+            # orjson rejects values the stdlib handles, like integers beyond 64 bits
+            pass
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"))
@@ -0,0 +1,157 @@
+import time
+import json_utils
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable
+
+class LLMCache:
+    """In-memory LRU cache for LLM responses with TTL expiry"""
+
+    def __init__(
+        self,
+        max_items: int = 128,
+        ttl: Optional[float] = 3600,
+        enabled: bool = True,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.92
+    ):
+        """Initialize the response cache
+
+        Args:
+            max_items: Maximum number of responses to keep
+            ttl: Seconds before an entry expires (None for no expiry)
+            enabled: Whether caching is enabled
+            embed_fn: Optional function returning an embedding for a text,
+                enables semantic lookup on the last user turn
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.entries = OrderedDict()
+        self.max_items = max_items
+        self.ttl = ttl
+        self.enabled = enabled
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], tools: List[str]) -> str:
+        """Build a cache key from the model, messages and tool names
+
+        Args:
+            model: Model name used for the request
+            messages: List of message dictionaries sent to the LLM
+            tools: Sorted list of tool names offered to the LLM
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json_utils.dumps({"model": model, "messages": messages, "tools": tools}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, scope: Optional[str] = None, text: Optional[str] = None) -> Optional[str]:
+        """Get a cached response
+
+        Args:
+            key: Exact cache key from make_key
+            scope: Key of the request context without the last user turn,
+                semantic matches are only considered within the same scope
+            text: Last user turn, used for semantic lookup
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if self._is_expired(entry):
+                del self.entries[key]
+            else:
+                self.entries.move_to_end(key)
+                return entry["value"]
+
+        if self.embed_fn and scope is not None and text:
+            return self._get_similar(scope, text)
+
+        return None
+
+    def set(self, key: str, value: str, scope: Optional[str] = None, text: Optional[str] = None) -> None:
+        """Store a response in the cache
+
+        Args:
+            key: Exact cache key from make_key
+            value: Response text from the LLM
+            scope: Key of the request context without the last user turn
+            text: Last user turn, embedded for semantic lookup
+        """
+        if not self.enabled:
+            return
+
+        embedding = None
+        if self.embed_fn and scope is not None and text:
+            embedding = self.embed_fn(text)
+
+        self.entries[key] = {
+            "value": value,
+            "time": time.monotonic(),
+            "scope": scope,
+            "embedding": embedding
+        }
+        self.entries.move_to_end(key)
+
+        # Evict least recently used entries
+        while len(self.entries) > self.max_items:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        self.entries.clear()
+
+    def is_enabled(self) -> bool:
+        """Check if caching is enabled
+
+        Returns:
+            Boolean indicating if caching is enabled
+        """
+        return self.enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Enable or disable caching
+
+        Args:
+            enabled: Boolean to enable/disable caching
+        """
+        self.enabled = enabled
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Check if a cache entry has outlived the TTL"""
+        return self.ttl is not None and time.monotonic() - entry["time"] > self.ttl
+
+    def _get_similar(self, scope: str, text: str) -> Optional[str]:
+        """Find the most similar cached response within the same scope"""
+        query_embedding = self.embed_fn(text)
+        best_key, best_score = None, self.similarity_threshold
+
+        for key, entry in list(self.entries.items()):
+            if entry["scope"] != scope or entry["embedding"] is None:
+                continue
+            if self._is_expired(entry):
+                del self.entries[key]
+                continue
+            score = _cosine_similarity(query_embedding, entry["embedding"])
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+
+        self.entries.move_to_end(best_key)
+        return self.entries[best_key]["value"]
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Compute cosine similarity between two vectors"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
@@ -1,8 +1,41 @@
 import os
+import asyncio
+import logging
 import json
-import re
-import importlib.util
-from typing import Dict, Any, List, Optional
+import weakref
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+log = logging.getLogger(__name__)
+
+class ProviderError(str):
+    """Error message returned or yielded by a provider in place of LLM output
+    
+    It is still a str so callers can show it to the user, but it lets the agent
+    tell failures apart from LLM text, e.g. an error after a partial stream.
+    """
+
+
+# Shared decoder for scanning LLM responses for tool calls
+_JSON_DECODER = json.JSONDecoder()
+
+@lru_cache(maxsize=None)
+def _get_shared_http_client():
+    """Get the HTTP client shared by all providers, or None if httpx is unavailable
+    
+    Sharing one connection pool lets every agent in the process reuse
+    keep-alive connections instead of opening its own.
+    """
+    try:
+        import httpx
+    except ImportError:
+        return None
+        
+    return httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        follow_redirects=True
+    )
 
 class LLMProvider:
     """Base class for LLM providers"""
@@ -30,29 +63,71 @@ class LLMProvider:
         """
         raise NotImplementedError("Subclasses must implement get_response")
     
-    def extract_tool_call(self, response_text: str) -> Optional[Dict[str, Any]]:
+    def get_response_stream(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Iterator[str]:
+        """Get response from the LLM as it is generated
+        
+        Args:
+            messages: List of message dictionaries
+            tools: Optional list of formatted tools
+        
+        Yields:
+            Chunks of response text from the LLM
+        """
+        # Providers without streaming support return the full response at once
+        yield self.get_response(messages, tools)
+    
+    async def aget_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
+        """Get response from the LLM without blocking the event loop
+        
+        Args:
+            messages: List of message dictionaries
+            tools: Optional list of formatted tools
+        
+        Returns:
+            Response from the LLM
+        """
+        # Providers without an async client run the blocking call in a thread
+        return await asyncio.to_thread(self.get_response, messages, tools)
+    
+    def _get_async_client(self):
+        """Get the async SDK client for the running event loop
+        
+        Async clients hold connections bound to the loop that opened them, so
+        each loop gets its own client, dropped when the loop is garbage collected.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_client_class(api_key=self.api_key)
+            self._async_clients[loop] = client
+        return client
+    
+    def extract_tool_call(self, response_text: str, first_only: bool = False) -> Optional[Dict[str, Any]]:
         """Extract tool call from LLM response
         
         Args:
             response_text: Response text from the LLM
+            first_only: Only consider the JSON object starting at the first brace
         
         Returns:
             Dictionary with tool name and parameters if a tool call is found
         """
-        try:
-            # Look for JSON format in the response
-            json_match = re.search(r'```(?:json)?\s*({[\s\S]*?})\s*```', response_text, re.DOTALL)
-            if not json_match:
-                # Try without code blocks in case LLM just returned JSON directly
-                json_match = re.search(r'^({[\s\S]*})$', response_text.strip(), re.DOTALL)
-                
-            if json_match:
-                json_str = json_match.group(1)
-                tool_call = json.loads(json_str)
-                if "tool" in tool_call and "parameters" in tool_call:
+        if not response_text:
+            return None
+            
+        # Decode from each opening brace and stop at the first complete tool call,
+        # whether fenced in a code block or returned as bare JSON
+        index = response_text.find('{')
+        while index != -1:
+            try:
+                tool_call, _ = _JSON_DECODER.raw_decode(response_text, index)
+                if isinstance(tool_call, dict) and "tool" in tool_call and "parameters" in tool_call:
                     return tool_call
-        except Exception as e:
-            print(f"Error extracting tool call: {str(e)}")
+            except json.JSONDecodeError:
+                pass
+            if first_only:
+                break
+            index = response_text.find('{', index + 1)
         
         return None
 
@@ -63,12 +138,35 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, model="gpt-4"):
         """Initialize the OpenAI provider"""
         self.model = model
+        self._formatted_tools_cache = (None, None)
         self.api_key = os.environ.get("OPENAI_API_KEY")
+        self._client = None
+        self._async_client_class = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._import_error = None
         if not self.api_key:
-            print("Warning: OPENAI_API_KEY not set in environment variables")
+            log.warning("OPENAI_API_KEY not set in environment variables")
+            return
+            
+        # Import once and keep one client so its connection pool is reused
+        try:
+            import openai
+            self._client = openai.Client(api_key=self.api_key, http_client=_get_shared_http_client())
+            self._async_client_class = openai.AsyncClient
+        except ImportError:
+            self._import_error = ProviderError("Error: OpenAI module not installed. Please install it with 'pip install openai'")
     
     def format_tools(self, tools: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Format tools for OpenAI function calling format"""
+        """Format tools for OpenAI function calling format
+        
+        The result is reused while the same tools dict is passed in; replace
+        the dict rather than mutating it in place to change the tools.
+        """
+        # Source and result are read and written as one tuple, since the provider is shared
+        cached_tools, cached_result = self._formatted_tools_cache
+        if tools is cached_tools:
+            return cached_result
+            
         formatted_tools = []
         
         for tool_name, tool_config in tools.items():
@@ -82,39 +180,76 @@ class OpenAIProvider(LLMProvider):
             }
             formatted_tools.append(formatted_tool)
             
+        # Keep a reference to the source so its identity can't be reused
+        self._formatted_tools_cache = (tools, formatted_tools)
         return formatted_tools
     
+    def _build_args(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Build chat completion arguments for OpenAI"""
+        args = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7
+        }
+        
+        # Add tools if provided
+        if tools:
+            args["tools"] = tools
+            args["tool_choice"] = "auto"
+            
+        return args
+    
     def get_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
         """Get response from OpenAI"""
         if not self.api_key:
-            return "Error: OpenAI API key not set. Please set the OPENAI_API_KEY environment variable."
+            return ProviderError("Error: OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
         
         try:
-            # Check if openai module is available
-            if importlib.util.find_spec("openai") is None:
-                return "Error: OpenAI module not installed. Please install it with 'pip install openai'"
-            
-            import openai
+            if self._import_error:
+                return self._import_error
             
-            client = openai.Client(api_key=self.api_key)
+            response = self._client.chat.completions.create(**self._build_args(messages, tools))
             
-            args = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": 0.7
-            }
+            return response.choices[0].message.content
             
-            # Add tools if provided
-            if tools:
-                args["tools"] = tools
-                args["tool_choice"] = "auto"
+        except Exception as e:
+            return ProviderError(f"Error calling OpenAI API: {str(e)}")
+    
+    async def aget_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
+        """Get response from OpenAI without blocking the event loop"""
+        if not self.api_key:
+            return ProviderError("Error: OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
+        
+        try:
+            if self._import_error:
+                return self._import_error
             
-            response = client.chat.completions.create(**args)
+            response = await self._get_async_client().chat.completions.create(**self._build_args(messages, tools))
             
             return response.choices[0].message.content
             
         except Exception as e:
-            return f"Error calling OpenAI API: {str(e)}"
+            return ProviderError(f"Error calling OpenAI API: {str(e)}")
+    
+    def get_response_stream(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Iterator[str]:
+        """Stream response from OpenAI"""
+        if not self.api_key:
+            yield ProviderError("Error: OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
+            return
+        
+        try:
+            if self._import_error:
+                yield self._import_error
+                return
+            
+            stream = self._client.chat.completions.create(stream=True, **self._build_args(messages, tools))
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                    
+        except Exception as e:
+            yield ProviderError(f"Error calling OpenAI API: {str(e)}")
 
 
 class AnthropicProvider(LLMProvider):
@@ -124,8 +259,21 @@ class AnthropicProvider(LLMProvider):
         """Initialize the Anthropic provider"""
         self.model = model
         self.api_key = os.environ.get("ANTHROPIC_API_KEY")
+        self._client = None
+        self._async_client_class = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._import_error = None
         if not self.api_key:
-            print("Warning: ANTHROPIC_API_KEY not set in environment variables")
+            log.warning("ANTHROPIC_API_KEY not set in environment variables")
+            return
+            
+        # Import once and keep one client so its connection pool is reused
+        try:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=self.api_key, http_client=_get_shared_http_client())
+            self._async_client_class = anthropic.AsyncAnthropic
+        except ImportError:
+            self._import_error = ProviderError("Error: Anthropic module not installed. Please install it with 'pip install anthropic'")
     
     def format_tools(self, tools: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Format tools for Claude (returned as empty list since Claude uses prompt)"""
@@ -133,49 +281,50 @@ class AnthropicProvider(LLMProvider):
         # The actual tools info is added to the system prompt in Agent class
         return []
     
+    def _convert_messages(self, messages: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Split messages into Claude's system prompt and message list"""
+        # Extract system prompt from messages
+        system_prompt = ""
+        claude_messages = []
+            
+        for msg in messages:
+            if msg["role"] == "system":
+                # System messages are handled differently in Claude
+                if not claude_messages:
+                    # If this is the first message, it will be the system prompt
+                    system_prompt = msg["content"]
+                else:
+                    # Otherwise, just add it as an assistant message
+                    claude_messages.append({
+                        "role": "assistant",
+                        "content": f"System message: {msg['content']}"
+                    })
+            elif msg["role"] == "user":
+                claude_messages.append({
+                    "role": "user",
+                    "content": msg["content"]
+                })
+            elif msg["role"] == "assistant":
+                claude_messages.append({
+                    "role": "assistant",
+                    "content": msg["content"]
+                })
+        
+        return system_prompt, claude_messages
+    
     def get_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
         """Get response from Anthropic"""
         if not self.api_key:
-            return "Error: Anthropic API key not set. Please set the ANTHROPIC_API_KEY environment variable."
+            return ProviderError("Error: Anthropic API key not set. Please set the ANTHROPIC_API_KEY environment variable.")
         
         try:
-            # Check if anthropic module is available
-            if importlib.util.find_spec("anthropic") is None:
-                return "Error: Anthropic module not installed. Please install it with 'pip install anthropic'"
+            if self._import_error:
+                return self._import_error
             
-            import anthropic
-            
-            client = anthropic.Anthropic(api_key=self.api_key)
-            
-            # Extract system prompt from messages
-            system_prompt = ""
-            claude_messages = []
-            
-            for msg in messages:
-                if msg["role"] == "system":
-                    # System messages are handled differently in Claude
-                    if not claude_messages:
-                        # If this is the first message, it will be the system prompt
-                        system_prompt = msg["content"]
-                    else:
-                        # Otherwise, just add it as an assistant message
-                        claude_messages.append({
-                            "role": "assistant",
-                            "content": f"System message: {msg['content']}"
-                        })
-                elif msg["role"] == "user":
-                    claude_messages.append({
-                        "role": "user",
-                        "content": msg["content"]
-                    })
-                elif msg["role"] == "assistant":
-                    claude_messages.append({
-                        "role": "assistant",
-                        "content": msg["content"]
-                    })
+            system_prompt, claude_messages = self._convert_messages(messages)
             
             # Create Claude message request
-            response = client.messages.create(
+            response = self._client.messages.create(
                 model=self.model,
                 system=system_prompt,
                 messages=claude_messages,
@@ -186,12 +335,72 @@ class AnthropicProvider(LLMProvider):
             return response.content[0].text
             
         except Exception as e:
-            return f"Error calling Anthropic API: {str(e)}"
+            return ProviderError(f"Error calling Anthropic API: {str(e)}")
+    
+    async def aget_response(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> str:
+        """Get response from Anthropic without blocking the event loop"""
+        if not self.api_key:
+            return ProviderError("Error: Anthropic API key not set. Please set the ANTHROPIC_API_KEY environment variable.")
+        
+        try:
+            if self._import_error:
+                return self._import_error
+            
+            system_prompt, claude_messages = self._convert_messages(messages)
+            
+            response = await self._get_async_client().messages.create(
+                model=self.model,
+                system=system_prompt,
+                messages=claude_messages,
+                max_tokens=2000,
+                temperature=0.7
+            )
+            
+            return response.content[0].text
+            
+        except Exception as e:
+            return ProviderError(f"Error calling Anthropic API: {str(e)}")
+    
+    def get_response_stream(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> Iterator[str]:
+        """Stream response from Anthropic"""
+        if not self.api_key:
+            yield ProviderError("Error: Anthropic API key not set. Please set the ANTHROPIC_API_KEY environment variable.")
+            return
+        
+        try:
+            if self._import_error:
+                yield self._import_error
+                return
+            
+            system_prompt, claude_messages = self._convert_messages(messages)
+            
+            with self._client.messages.stream(
+                model=self.model,
+                system=system_prompt,
+                messages=claude_messages,
+                max_tokens=2000,
+                temperature=0.7
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+                    
+        except Exception as e:
+            yield ProviderError(f"Error calling Anthropic API: {str(e)}")
+
 
+@lru_cache(maxsize=None)
+def _create_llm_provider(provider_name: str) -> LLMProvider:
+    """Create the provider for a normalized name, once per process"""
+    if provider_name == "openai":
+        return OpenAIProvider()
+    return AnthropicProvider()
 
 def get_llm_provider(provider_name: str) -> LLMProvider:
     """Get the appropriate LLM provider based on name
     
+    Providers are created on first use and shared by all agents, so the
+    API key must be in the environment before the first agent is created.
+    
     Args:
         provider_name: Name of the provider ("openai" or "anthropic")
     
@@ -201,9 +410,7 @@ def get_llm_provider(provider_name: str) -> LLMProvider:
     Raises:
         ValueError: If an unsupported provider is specified
     """
-    if provider_name.lower() == "openai":
-        return OpenAIProvider()
-    elif provider_name.lower() == "anthropic":
-        return AnthropicProvider()
-    else:
-        raise ValueError(f"Unsupported LLM provider: {provider_name}")
\ No newline at end of file
+    if provider_name.lower() not in ("openai", "anthropic"):
+        raise ValueError(f"Unsupported LLM provider: {provider_name}")
+    
+    return _create_llm_provider(provider_name.lower())
\ No newline at end of file
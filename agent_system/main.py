@@ -1,9 +1,15 @@
 import os
-from agent import create_agent, run_agent
+import logging
+from agent import create_agent, run_agent_stream
 from tool import ToolManager
 
 def main():
     """Run the agent in interactive mode"""
+    # Show setup messages from the agent modules, but only warnings from libraries like httpx
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    for logger_name in ("agent", "tool", "llm_provider"):
+        logging.getLogger(logger_name).setLevel(logging.INFO)
+    
     # Check for config file
     config_path = "agent_config.json"
     
@@ -44,8 +50,11 @@ def main():
             print("Goodbye!")
             break
             
-        response = run_agent(agent, query)
-        print(f"\n{agent.name}: {response}")
+        # Print the response as it arrives
+        print(f"\n{agent.name}: ", end="", flush=True)
+        for chunk in run_agent_stream(agent, query):
+            print(chunk, end="", flush=True)
+        print()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
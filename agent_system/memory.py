@@ -1,17 +1,40 @@
+from collections import deque
+from functools import lru_cache
 from typing import Dict, List, Any
 
+@lru_cache(maxsize=None)
+def _get_encoding():
+    """Load the tiktoken encoding once, or None if tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text, approximating 4 characters per token without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        # Special-token strings in user text are counted as plain text instead of raising
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4
+
 class Memory:
     """Manages conversation memory for the agent"""
     
-    def __init__(self, max_items: int = 10, enabled: bool = True):
+    def __init__(self, max_items: int = 10, enabled: bool = True, max_tokens: int = 2000):
         """Initialize the memory manager
         
         Args:
             max_items: Maximum number of messages to keep in memory
             enabled: Whether memory is enabled
+            max_tokens: Approximate token budget for all messages in memory
         """
-        self.messages = []
+        self.messages = deque(maxlen=max_items)
+        self.token_counts = deque(maxlen=max_items)
+        self.total_tokens = 0
         self.max_items = max_items
+        self.max_tokens = max_tokens
         self.enabled = enabled
     
     def add(self, role: str, content: str) -> None:
@@ -24,11 +47,19 @@ class Memory:
         if not self.enabled:
             return
             
+        # The deques drop the oldest message once max_items is reached
+        if len(self.messages) == self.max_items:
+            self.total_tokens -= self.token_counts[0]
+            
+        tokens = count_tokens(content or "")
         self.messages.append({"role": role, "content": content})
+        self.token_counts.append(tokens)
+        self.total_tokens += tokens
         
-        # Keep memory to max size
-        if len(self.messages) > self.max_items:
-            self.messages = self.messages[-self.max_items:]
+        # Evict oldest messages until within the token budget, keeping the newest
+        while self.total_tokens > self.max_tokens and len(self.messages) > 1:
+            self.messages.popleft()
+            self.total_tokens -= self.token_counts.popleft()
     
     def get_messages(self) -> List[Dict[str, str]]:
         """Get all messages in memory
@@ -36,11 +67,13 @@ class Memory:
         Returns:
             List of message dictionaries with role and content
         """
-        return self.messages
+        return list(self.messages)
     
     def clear(self) -> None:
         """Clear all messages from memory"""
-        self.messages = []
+        self.messages.clear()
+        self.token_counts.clear()
+        self.total_tokens = 0
     
     def is_enabled(self) -> bool:
         """Check if memory is enabled
@@ -0,0 +1,112 @@
+import copy
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+class PlanCache:
+    """Remembers which tool call a query led to so repeated queries can skip tool routing"""
+
+    def __init__(self, min_count: int = 2, enabled: bool = True, max_items: int = 256):
+        """Initialize the plan cache
+
+        Args:
+            min_count: Number of successful runs before a plan is reused
+            enabled: Whether the plan cache is enabled
+            max_items: Maximum number of plans to keep
+        """
+        self.plans = OrderedDict()
+        self.max_items = max_items
+        self.min_count = min_count
+        self.enabled = enabled
+
+    @staticmethod
+    def fingerprint(query: str, context: str = "") -> str:
+        """Normalize a query for lookup
+
+        Case and whitespace are ignored; word order and punctuation are kept
+        since they can change the tool parameters (e.g. '2 - 3' vs '3 - 2').
+        The context keeps follow-ups like 'and double it' from reusing a plan
+        made after a different previous turn.
+        """
+        return context + "\n" + " ".join(query.lower().split())
+
+    def get(self, query: str, context: str = "") -> Optional[Dict[str, Any]]:
+        """Get the tool call for a query once it has succeeded often enough
+
+        Args:
+            query: The user query
+            context: The previous turn of the conversation
+
+        Returns:
+            Dictionary with tool name and parameters, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = self.fingerprint(query, context)
+        plan = self.plans.get(key)
+        if plan is None:
+            return None
+
+        self.plans.move_to_end(key)
+        if plan["count"] < self.min_count:
+            return None
+
+        return {"tool": plan["tool"], "parameters": copy.deepcopy(plan["parameters"])}
+
+    def record(self, query: str, tool_call: Dict[str, Any], success: bool, context: str = "") -> None:
+        """Record the outcome of running a tool call for a query
+
+        Args:
+            query: The user query
+            tool_call: Dictionary with tool name and parameters
+            success: Whether the tool ran without error
+            context: The previous turn of the conversation
+        """
+        if not self.enabled:
+            return
+
+        key = self.fingerprint(query, context)
+
+        # Failed plans are forgotten so the query goes back through the LLM
+        if not success:
+            self.plans.pop(key, None)
+            return
+
+        tool_name = tool_call.get("tool")
+        parameters = tool_call.get("parameters", {})
+        plan = self.plans.get(key)
+
+        if plan and plan["tool"] == tool_name and plan["parameters"] == parameters:
+            plan["count"] += 1
+        else:
+            self.plans[key] = {
+                "tool": tool_name,
+                "parameters": copy.deepcopy(parameters),
+                "count": 1
+            }
+
+        self.plans.move_to_end(key)
+
+        # Evict least recently used plans
+        while len(self.plans) > self.max_items:
+            self.plans.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all recorded plans"""
+        self.plans.clear()
+
+    def is_enabled(self) -> bool:
+        """Check if the plan cache is enabled
+
+        Returns:
+            Boolean indicating if the plan cache is enabled
+        """
+        return self.enabled
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Enable or disable the plan cache
+
+        Args:
+            enabled: Boolean to enable/disable the plan cache
+        """
+        self.enabled = enabled
@@ -0,0 +1,32 @@
+# Serve several queries concurrently on one event loop
+import asyncio
+import os
+from agent import create_agent, arun_agent
+from tool import ToolManager
+
+async def handle_queries(agent, queries):
+    """Process queries concurrently and return the responses in order"""
+    return await asyncio.gather(*(arun_agent(agent, query) for query in queries))
+
+def main():
+    """Run a batch of example queries through the async agent"""
+    # Ensure we have a config file
+    config_path = "agent_config.json"
+    if not os.path.exists(config_path):
+        ToolManager.setup_basic_config()
+    
+    agent = create_agent(config_path, "openai")
+    
+    # Memory holds a single conversation, so concurrent independent queries
+    # on one shared agent would see each other's turns
+    agent.memory.set_enabled(False)
+    
+    queries = ["What is 2 + 2?", "What is 12 * 7?", "What is the square root of 144?"]
+    responses = asyncio.run(handle_queries(agent, queries))
+    
+    for query, response in zip(queries, responses):
+        print(f"You: {query}")
+        print(f"{agent.name}: {response}\n")
+
+if __name__ == "__main__":
+    main()
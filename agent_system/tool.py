@@ -1,7 +1,15 @@
 import os
+import logging
 import json
 from typing import Dict, Any, List
 
+log = logging.getLogger(__name__)
+
+# Manifest of all tool configurations, so agents can load them in one read.
+# The leading underscore keeps it apart from tools/<name>.json configs.
+TOOL_INDEX_NAME = "_index"
+TOOL_INDEX_PATH = f"tools/{TOOL_INDEX_NAME}.json"
+
 class ToolManager:
     """Utility class to create and manage tool configurations"""
     
@@ -12,9 +20,19 @@ class ToolManager:
         function_path: str,
         parameters: Dict[str, Any],
         required_params: List[str] = None,
-        keywords: List[str] = None
+        keywords: List[str] = None,
+        cacheable: bool = False
     ) -> None:
-        """Create a tool configuration file"""
+        """Create a tool configuration file
+        
+        Set cacheable for pure tools whose results depend only on their parameters
+        
+        Raises:
+            ValueError: If the tool name is reserved for the tool index
+        """
+        if tool_name == TOOL_INDEX_NAME:
+            raise ValueError(f"Tool name is reserved for the tool index: {tool_name}")
+            
         os.makedirs("tools", exist_ok=True)
         
         tool_config = {
@@ -26,13 +44,32 @@ class ToolManager:
                 "properties": parameters,
                 "required": required_params or []
             },
-            "keywords": keywords or []
+            "keywords": keywords or [],
+            "cacheable": cacheable
         }
         
         with open(f"tools/{tool_name}.json", 'w') as f:
             json.dump(tool_config, f, indent=2)
         
-        print(f"Tool configuration created: tools/{tool_name}.json")
+        ToolManager.update_tool_index(tool_name, tool_config)
+        
+        log.info("Tool configuration created: tools/%s.json", tool_name)
+    
+    @staticmethod
+    def update_tool_index(tool_name: str, tool_config: Dict[str, Any]) -> None:
+        """Add or replace a tool configuration in the tool index"""
+        tool_index = {}
+        if os.path.exists(TOOL_INDEX_PATH):
+            with open(TOOL_INDEX_PATH, 'r') as f:
+                try:
+                    tool_index = json.load(f)
+                except json.JSONDecodeError:
+                    log.warning("Rebuilding invalid tool index: %s", TOOL_INDEX_PATH)
+        
+        tool_index[tool_name] = tool_config
+        
+        with open(TOOL_INDEX_PATH, 'w') as f:
+            json.dump(tool_index, f, indent=2)
     
     @staticmethod
     def register_basic_tools():
@@ -44,14 +81,15 @@ class ToolManager:
         ToolManager.create_tool_config(
             tool_name="calculator",
             description="Evaluate a mathematical expression",
-            function_path="tools.calculator.evaluate",
+            function_path="tools.calculator.evaluate.evaluate",
             parameters={
                 "expression": {
                     "type": "string",
                     "description": "Mathematical expression to evaluate (e.g. '2 + 2')"
                 }
             },
-            required_params=["expression"]
+            required_params=["expression"],
+            cacheable=True
         )
         
         # Create calculator tool implementation
@@ -98,7 +136,7 @@ def evaluate(expression):
         return f"Error evaluating expression: {str(e)}"
 """)
         
-        print("Calculator tool registered successfully!")
+        log.info("Calculator tool registered successfully!")
     
     @staticmethod
     def setup_basic_config():
@@ -120,4 +158,4 @@ def evaluate(expression):
         with open("agent_config.json", 'w') as f:
             json.dump(agent_config, f, indent=2)
         
-        print("Basic agent configuration set up successfully!")
\ No newline at end of file
+        log.info("Basic agent configuration set up successfully!")
\ No newline at end of file